@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Optional, Literal
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from fastapi import Request, Body
@@ -20,6 +20,12 @@ client = MongoClient(MONGO_URI)
 db = client["praiometro"]
 colecao_votos = db["votos"]
 
+PRAZO_VOTO = timedelta(days=30)  # intervalo mínimo entre votos do mesmo usuário na mesma praia
+VOTOS_RECENTES = {}  # índice em memória (por worker): (user_id, praia_id) -> datetime do voto
+INTERVALO_PODA = timedelta(hours=1)  # frequência da remoção de votos expirados de VOTOS_RECENTES
+ULTIMA_PODA = datetime.utcnow()
+TAREFA_VOTOS = None  # tarefa em segundo plano que prepara o índice de votos
+
 PONTOS_FILE = os.getenv("PONTOS_FILE", "pontos.json")  # arquivo gerado pelo praiômetro
 CACHE = {}  # cache em memória dos pontos
 FILE_HASH = None  # hash MD5 do arquivo carregado
@@ -61,9 +67,64 @@ async def load_cache():
     except Exception as e:
         print(f"[Cache] Erro ao carregar {PONTOS_FILE}: {e}")
 
+def criar_indices_votos():
+    #Cria os índices usados nas consultas de votos.
+    try:
+        colecao_votos.create_index([("user_id", ASCENDING), ("praia_id", ASCENDING)])  # /votar
+        colecao_votos.create_index([("user_id", ASCENDING), ("timestamp", ASCENDING)])  # /votos/status
+        colecao_votos.create_index([("timestamp", ASCENDING)])  # aquecimento de VOTOS_RECENTES
+    except Exception as e:
+        print(f"[Votos] Erro ao criar índices: {e}")
+
+def carregar_votos_recentes():
+    #Aquece VOTOS_RECENTES com os votos feitos dentro do prazo.
+    global ULTIMA_PODA
+    agora = datetime.utcnow()
+    limite = (agora - PRAZO_VOTO).isoformat()
+    try:
+        # update em vez de substituir, para não perder votos registrados durante o aquecimento
+        VOTOS_RECENTES.update({
+            (voto["user_id"], voto["praia_id"]): datetime.fromisoformat(voto["timestamp"])
+            for voto in colecao_votos.find(
+                {"timestamp": {"$gte": limite}},
+                {"_id": 0, "user_id": 1, "praia_id": 1, "timestamp": 1}
+            )
+        })
+        ULTIMA_PODA = agora
+        print(f"[Votos] {len(VOTOS_RECENTES)} votos recentes carregados")
+    except Exception as e:
+        print(f"[Votos] Erro ao carregar votos recentes: {e}")
+
+def voto_recente(user_id: str, praia_id: str, agora: datetime) -> bool:
+    #Consulta o índice em memória, descartando a entrada se já expirou.
+    data_voto = VOTOS_RECENTES.get((user_id, praia_id))
+    if data_voto is None:
+        return False
+    if agora >= data_voto + PRAZO_VOTO:
+        VOTOS_RECENTES.pop((user_id, praia_id), None)
+        return False
+    return True
+
+def podar_votos_recentes(agora: datetime):
+    #Remove de VOTOS_RECENTES os votos expirados, no máximo uma vez por INTERVALO_PODA.
+    global ULTIMA_PODA
+    if agora < ULTIMA_PODA + INTERVALO_PODA:
+        return
+    ULTIMA_PODA = agora
+    for chave, data_voto in list(VOTOS_RECENTES.items()):
+        if agora >= data_voto + PRAZO_VOTO:
+            VOTOS_RECENTES.pop(chave, None)
+
+async def preparar_votos():
+    #Cria índices e aquece VOTOS_RECENTES fora do event loop, sem atrasar o startup.
+    await asyncio.to_thread(criar_indices_votos)
+    await asyncio.to_thread(carregar_votos_recentes)
+
 @app.on_event("startup")
 async def on_startup():
+    global TAREFA_VOTOS
     await load_cache()
+    TAREFA_VOTOS = asyncio.create_task(preparar_votos())
 
 @app.post("/notificar-atualizacao", summary="Notifica a API que pontos.json foi atualizado")
 async def notificar_atualizacao():
@@ -185,19 +246,23 @@ async def votar(
     votos: dict = Body(...)
 ):
     user_id = verificar_token_google(token)
+    agora = datetime.utcnow()
+
+    # Caminho rápido: voto recente já conhecido por este worker
+    if voto_recente(user_id, praia_id, agora):
+        return {"votou": True}
 
-    # Busca voto anterior, se houver
+    # Busca voto anterior, se houver (pode ter sido feito em outro worker)
     voto_antigo = colecao_votos.find_one({
-        "praia_id": praia_id,
-        "user_id": user_id
+        "user_id": user_id,
+        "praia_id": praia_id
     })
 
-    agora = datetime.utcnow()
-
     if voto_antigo:
         data_voto = datetime.fromisoformat(voto_antigo["timestamp"])
         # Se voto foi feito há menos de 30 dias
-        if agora < data_voto + timedelta(days=30):
+        if agora < data_voto + PRAZO_VOTO:
+            VOTOS_RECENTES[(user_id, praia_id)] = data_voto
             return {"votou": True}
 
         # Substitui voto antigo por novo
@@ -217,9 +282,35 @@ async def votar(
         "timestamp": agora.isoformat()
     }
     colecao_votos.insert_one(doc)
+    VOTOS_RECENTES[(user_id, praia_id)] = agora
+    podar_votos_recentes(agora)
 
     return {"msg": "Voto registrado com sucesso", "votou": False}
 
+@app.get("/votos/status", summary="Praias em que o usuário já votou nos últimos 30 dias")
+def status_votos(token: str = Query(..., description="Token OAuth Google")):
+    if not CACHE:
+        raise HTTPException(status_code=503, detail="Cache não está disponível")
+    user_id = verificar_token_google(token)
+    agora = datetime.utcnow()
+    limite = (agora - PRAZO_VOTO).isoformat()
+
+    # Uma única consulta no índice (user_id, timestamp) traz
+    # também votos registrados por outros workers
+    for voto in colecao_votos.find(
+        {"user_id": user_id, "timestamp": {"$gte": limite}},
+        {"_id": 0, "praia_id": 1, "timestamp": 1}
+    ):
+        VOTOS_RECENTES[(user_id, voto["praia_id"])] = datetime.fromisoformat(voto["timestamp"])
+    podar_votos_recentes(agora)
+
+    return {
+        "status": {
+            codigo: voto_recente(user_id, codigo, agora)
+            for codigo in CACHE
+        }
+    }
+
 # Execução via Uvicorn/Gunicorn
 if __name__ == "__main__":
     import uvicorn